@@ -1,22 +1,27 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 import re
-import tldextract
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+import json
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from urllib.parse import urlsplit
 import tempfile
+import shutil
+import io
 import numpy as np
 import datetime
-import itertools
+import functools
+import zlib
+from collections import Counter
 
-# pytrends optional import
+# orjson optional import
 try:
-    from pytrends.request import TrendReq
-    PYTRENDS_AVAILABLE = True
-except Exception:
-    TrendReq = None
-    PYTRENDS_AVAILABLE = False
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 # Backend import
 from compeers_ai.harvester import run_harvest
@@ -34,58 +39,239 @@ st.divider()
 # ---------------- Sidebar Navigation ----------------
 st.sidebar.title("Navigation")
 page = st.sidebar.radio("Go to", ["Source Discovery", "Market Metrics", "Search Interest", "Competitor Landscape"])
+bypass_cache = st.sidebar.checkbox("Bypass cache", help="Re-fetch search and trends data instead of reusing results from the last hour")
 
 # ---------------- Helpers ----------------
-def google_search_raw(q, api_key, cse_id, total_num_results):
-    service = build("customsearch", "v1", developerKey=api_key)
-    all_items = []
+_CSE_URL = "https://www.googleapis.com/customsearch/v1"
+
+@st.cache_resource(show_spinner=False)
+def _http_session():
+    # keep-alive pool sized for the up-to-10 pages google_search_raw fetches at once,
+    # so concurrent pages reuse TLS connections instead of handshaking per request
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=10))
+    return session
+
+def _fetch_cse_page(q, cse_id, start, api_key):
+    # key goes in a header so it never shows up in a raise_for_status() message
+    r = _http_session().get(_CSE_URL, params={"q": q, "cx": cse_id, "num": 10, "start": start},
+                            headers={"X-Goog-Api-Key": api_key}, timeout=10)
+    r.raise_for_status()
+    resp = json_loads(r.content)
+    total = resp.get("searchInformation", {}).get("totalResults")
+    return {
+        "items": resp.get("items", []),
+        "has_next": "nextPage" in resp.get("queries", {}),
+        "total_results": int(total) if total is not None else None,
+    }
+
+# _api_key is left out of the cache key so the secret is never hashed. Pages are cached
+# individually so a search for more results reuses the pages it shares with a smaller one.
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cse_page(q, cse_id, start, _api_key):
+    return _fetch_cse_page(q, cse_id, start, _api_key)
+
+def google_search_raw(q, api_key, cse_id, total_num_results, refresh=False):
+    # refresh bypasses the process-wide cache for this call only; clearing it would
+    # drop every other session's cached searches too
+    fetch = _fetch_cse_page if refresh else _cse_page
     total_to_fetch = min(total_num_results, 100)
-    for start_index in range(1, total_to_fetch + 1, 10):
+    first = fetch(q, cse_id, 1, api_key)
+    all_items = first["items"]
+    if len(all_items) >= total_to_fetch or not first["has_next"]:
+        return all_items[:total_num_results]
+    # only fan out over pages the first response says can hold results
+    available = first["total_results"] if first["total_results"] is not None else total_to_fetch
+    starts = range(11, min(total_to_fetch, available) + 1, 10)
+    if not starts:
+        return all_items[:total_num_results]
+    # st.cache_data needs the session's ScriptRunContext; worker threads don't inherit it
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=len(starts), initializer=add_script_run_ctx, initargs=(None, ctx)) as ex:
+        futures = [ex.submit(fetch, q, cse_id, start_index, api_key) for start_index in starts]
+    for fut in futures:
         try:
-            resp = service.cse().list(q=q, cx=cse_id, num=10, start=start_index).execute()
-            current_items = resp.get("items", [])
-            all_items.extend(current_items)
-            if len(all_items) >= total_num_results or not current_items:
-                all_items = all_items[:total_num_results]
-                break
-        except HttpError as e:
-            raise e
-        except Exception as e:
-            raise e
-    return all_items
-
-PAYWALLED = {"nytimes.com", "wsj.com", "ft.com", "economist.com"}
-
-def infer_publisher_and_type(url, title, snippet):
-    ext = tldextract.extract(url)
-    domain = ".".join(part for part in (ext.domain, ext.suffix) if part)
-    publisher = domain if domain else url
-    low = (domain or "").lower()
-    src_type = "Other"
-    if any(x in low for x in ("amazon","flipkart","walmart","alibaba","etsy")):
-        src_type = "E-commerce"
-    elif any(x in low for x in ("wikipedia","edu")):
-        src_type = "Academic"
-    elif any(x in low for x in ("medium","blogspot","wordpress","substack","blog")):
-        src_type = "Blog"
-    elif any(x in low for x in ("news","guardian","reuters","bbc","economictimes","thehindu")):
-        src_type = "News"
-    elif any(x in low for x in ("gov","who.int","un.org")):
-        src_type = "Official"
-    else:
-        combined = (title or "") + " " + (snippet or "")
-        if re.search(r"\b(review|buy|price|shop|discount|sale)\b", combined, re.I):
-            src_type = "E-commerce"
-        elif re.search(r"\b(study|journal|research|doi|pdf)\b", combined, re.I):
-            src_type = "Academic"
-        else:
-            src_type = "Vendor/Other"
-    access = "Paywalled" if domain in PAYWALLED else "Free"
-    return publisher, src_type, access
+            current_items = fut.result()["items"]
+        except requests.HTTPError:
+            # CSE answers 400 for pages past the end of the result set
+            break
+        if not current_items:
+            break
+        all_items.extend(current_items)
+    return all_items[:total_num_results]
+
+PAYWALLED = frozenset({"nytimes.com", "wsj.com", "ft.com", "economist.com"})
+
+@functools.lru_cache(maxsize=None)
+def _tld_extractor():
+    # tldextract and pytrends are imported on first use so the first page render doesn't wait on them
+    import tldextract
+    # bundled public-suffix snapshot only: no live PSL fetch, no on-disk cache lookups
+    return tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+
+_KEYWORD_TO_TYPE = {
+    "amazon": "E-commerce", "flipkart": "E-commerce", "walmart": "E-commerce", "alibaba": "E-commerce", "etsy": "E-commerce",
+    "wikipedia": "Academic", "edu": "Academic",
+    "medium": "Blog", "blogspot": "Blog", "wordpress": "Blog", "substack": "Blog", "blog": "Blog",
+    "news": "News", "guardian": "News", "reuters": "News", "bbc": "News", "economictimes": "News", "thehindu": "News",
+    "gov": "Official", "who.int": "Official", "un.org": "Official",
+}
+# insertion order doubles as category precedence when a domain hits several keywords
+_KEYWORD_RANK = {k: i for i, k in enumerate(_KEYWORD_TO_TYPE)}
+_DOMAIN_CLASSIFY = re.compile("|".join(map(re.escape, _KEYWORD_TO_TYPE)))
+
+# demo rubric values, tiled down the competitor table
+MOVI_DEMO_VALUES = {
+    "Market Share": np.array(["High", "Medium", "Low"], dtype=object),
+    "Offering": np.array(["Premium", "Mass", "Niche"], dtype=object),
+    "Value Proposition": np.array(["Quality", "Price", "Reach"], dtype=object),
+    "Innovation": np.array(["Strong", "Moderate", "Weak"], dtype=object)
+}
+SWOT_DEMO_VALUES = {
+    "Strength": np.array(["Brand", "Distribution", "R&D"], dtype=object),
+    "Weakness": np.array(["Price", "Portfolio gap", "Quality perception"], dtype=object),
+    "Opportunity": np.array(["Channel expansion", "New segment", "Premiumization"], dtype=object),
+    "Threat": np.array(["Regulation", "New entrants", "Raw material cost"], dtype=object)
+}
+
+_TRACKING_PARAMS = ("utm_", "gclid=", "fbclid=")
+
+_RE_ECOM = re.compile(r"\b(?:review|buy|price|shop|discount|sale)\b", re.I)
+_RE_ACAD = re.compile(r"\b(?:study|journal|research|doi|pdf)\b", re.I)
+_RE_YEAR = re.compile(r"((?:19|20)\d{2})")
+_RE_TOKENS = re.compile(r"\b[a-z]{4,}\b")
+
+# Public suffixes with no deeper ICANN rules beneath them, so "<label>.<suffix>" is
+# exactly what tldextract would return. Anything else goes through tldextract.
+_SIMPLE_TLDS = frozenset({"com", "org", "net", "edu", "gov", "mil", "info", "biz"})
+_SIMPLE_SLD_SUFFIXES = frozenset({"co.uk", "org.uk", "ac.uk", "gov.uk", "co.in", "com.au", "co.jp"})
 
-def extract_year(text):
-    match = re.search(r"(19|20)\d{2}", text)
-    return match.group(0) if match else ""
+# module-level, so the memo survives Streamlit reruns within the process
+@functools.lru_cache(maxsize=4096)
+def _domain(url):
+    host = urlsplit(url).hostname or ""
+    labels = host.split(".")
+    if len(labels) >= 3 and ".".join(labels[-2:]) in _SIMPLE_SLD_SUFFIXES:
+        return ".".join(labels[-3:])
+    if len(labels) >= 2 and labels[-1] in _SIMPLE_TLDS:
+        return ".".join(labels[-2:])
+    ext = _tld_extractor()(url)
+    return ".".join(part for part in (ext.domain, ext.suffix) if part)
+
+def _dedup_key(url):
+    # same page reached through different tracking params or anchors
+    parts = urlsplit(url)
+    query = "&".join(p for p in parts.query.split("&") if p and not p.lower().startswith(_TRACKING_PARAMS))
+    return parts._replace(query=query, fragment="").geturl()
+
+@functools.lru_cache(maxsize=2048)
+def _domain_type(domain):
+    hits = _DOMAIN_CLASSIFY.findall(domain.lower())
+    return _KEYWORD_TO_TYPE[min(hits, key=_KEYWORD_RANK.__getitem__)] if hits else None
+
+# a repeated search hands back the same items, so skip re-classifying them
+@st.cache_data(show_spinner=False)
+def classify_items(items):
+    df = pd.DataFrame(items, columns=["title", "link", "snippet"]).fillna("")
+    # broad queries can repeat a page across result pages
+    df = df[~df["link"].map(_dedup_key).duplicated()]
+    domains = df["link"].map(_domain)
+    domain_types = domains.map(_domain_type)
+    text = df["title"] + " " + df["snippet"]
+    # most links classify by domain; the title/snippet regexes only run on the rest
+    src_types = domain_types.copy()
+    undecided = src_types.isna()
+    if undecided.any():
+        rest = text[undecided]
+        src_types[undecided] = np.select(
+            [rest.str.contains(_RE_ECOM), rest.str.contains(_RE_ACAD)],
+            ["E-commerce", "Academic"],
+            "Vendor/Other",
+        )
+    snippets = df["snippet"]
+    return pd.DataFrame({
+        "source_type": src_types,
+        "title": df["title"],
+        "publisher": domains.where(domains != "", df["link"]),
+        "coverage_period": text.str.extract(_RE_YEAR, expand=False).fillna(""),
+        "access_type": np.where(domains.isin(PAYWALLED), "Paywalled", "Free"),
+        "url": df["link"],
+        "relevance_note": snippets.where(snippets.str.len() <= 200, snippets.str.slice(0, 200) + "..."),
+    }).reset_index(drop=True).astype("string[pyarrow]")
+
+def _read_table(uploaded_file):
+    # multi-threaded pyarrow / Rust calamine readers when available, pandas' defaults otherwise
+    if uploaded_file.name.lower().endswith(".csv"):
+        try:
+            return pd.read_csv(uploaded_file, engine="pyarrow")
+        except (ImportError, ValueError):
+            uploaded_file.seek(0)
+            return pd.read_csv(uploaded_file)
+    try:
+        return pd.read_excel(uploaded_file, engine="calamine")
+    except (ImportError, ValueError):
+        uploaded_file.seek(0)
+        return pd.read_excel(uploaded_file)
+
+# download_button payloads are built on every rerun, not on click
+@st.cache_data(show_spinner=False)
+def _df_to_csv_bytes(df):
+    # encode while writing instead of building a str and re-encoding it
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, encoding="utf-8")
+    return buf.getvalue()
+
+# tuples so st.cache_data can hash the approved rows cheaply
+@st.cache_data(show_spinner=False)
+def suggest_normalized(titles, notes, cat):
+    # one lowercase + findall over all approved rows instead of one per row
+    text = " ".join(f"{t} {n}" for t, n in zip(titles, notes)).lower()
+    freq = Counter(_RE_TOKENS.findall(text))
+    suggestions = [w for w, _ in freq.most_common(8)]
+    suggested = f"{suggestions[0].title()}" if suggestions else cat.strip().title()
+    if len(suggestions) > 1:
+        suggested += f" > {suggestions[1].title()}"
+    return suggested
+
+def _trend_req_cls():
+    # pytrends is optional; fall back to demo data when it isn't installed
+    try:
+        from pytrends.request import TrendReq
+    except Exception:
+        return None
+    return TrendReq
+
+def _fetch_interest_over_time(topic, geo, tf):
+    pytrends = _trend_req_cls()(hl='en-US', tz=330)
+    pytrends.build_payload([topic], timeframe=tf, geo=geo)
+    return pytrends.interest_over_time()
+
+# pytrends is slow and rate-limited; the same topic/geo/timeframe is served from cache for an hour
+@st.cache_data(ttl=3600, show_spinner=False)
+def _interest_over_time(topic, geo, tf):
+    return _fetch_interest_over_time(topic, geo, tf)
+
+@st.cache_data(show_spinner=False)
+def _demo_trends(topic, months, end):
+    # seeded per topic so reruns redraw the same series instead of a fresh random one
+    rng = np.random.default_rng(zlib.crc32(topic.encode("utf-8")))
+    # the last `months` month-ends on or before `end`, via datetime64 month arithmetic;
+    # this also avoids date_range's "M" alias, which pandas has removed in favour of "ME"
+    last = np.datetime64(end, "M")
+    if (last + 1).astype("datetime64[D]") - 1 > np.datetime64(end, "D"):
+        last -= 1
+    month_starts = last - np.arange(months - 1, -1, -1) + 1
+    dates = pd.DatetimeIndex(month_starts.astype("datetime64[D]") - 1)
+    # scale, round and clip in place on one buffer rather than chaining temporaries
+    values = rng.standard_normal(len(dates))
+    values *= 18
+    values += 55
+    np.rint(values, out=values)
+    np.clip(values, 1, 100, out=values)
+    values = values.astype(np.int16)
+    df = pd.DataFrame({topic: values}, index=dates)
+    df.index.name = "date"
+    return df
 
 # =========================================================
 #  PAGE 1: SOURCE DISCOVERY
@@ -95,11 +281,14 @@ if page == "Source Discovery":
         st.session_state['short_df'] = None
 
     st.subheader("1. Define Search Parameters")
-    cat = st.text_input("Category / Topic (e.g., Men's Face Wash Market)")
-    hint = st.text_input("Refinement Keywords (comma-separated, optional)")
-    num_results = st.slider("Number of Search Results to Retrieve", min_value=5, max_value=100, value=20)
+    # a form so typing and dragging the slider don't rerun the script until submit
+    with st.form("discovery_form"):
+        cat = st.text_input("Category / Topic (e.g., Men's Face Wash Market)")
+        hint = st.text_input("Refinement Keywords (comma-separated, optional)")
+        num_results = st.slider("Number of Search Results to Retrieve", min_value=5, max_value=100, value=20)
+        submitted = st.form_submit_button("2. Run Auto-Discovery and Classify Sources", type="primary", use_container_width=True)
 
-    if st.button("2. Run Auto-Discovery and Classify Sources", type="primary", use_container_width=True):
+    if submitted:
         if not API_KEY or not CSE_ID:
             st.error("API KEYS NOT FOUND. Please set GOOGLE_API_KEY and GOOGLE_CSE_ID in Streamlit secrets.")
             st.session_state['short_df'] = None
@@ -113,7 +302,7 @@ if page == "Source Discovery":
 
             with st.spinner('Searching the web and classifying sources...'):
                 try:
-                    items = google_search_raw(query, API_KEY, CSE_ID, num_results)
+                    items = google_search_raw(query, API_KEY, CSE_ID, num_results, refresh=bypass_cache)
                 except Exception as e:
                     st.error(f"Search failed: {e}")
                     items = []
@@ -122,59 +311,30 @@ if page == "Source Discovery":
                 st.warning("No search results found.")
                 st.session_state['short_df'] = None
             else:
-                rows = []
-                for it in items:
-                    title = it.get("title", "")
-                    link = it.get("link", "")
-                    snippet = it.get("snippet", "")
-                    publisher, src_type, access = infer_publisher_and_type(link, title, snippet)
-                    coverage = extract_year(title + " " + snippet) or ""
-                    relevance_note = (snippet[:200] + "...") if snippet and len(snippet) > 200 else (snippet or "")
-                    rows.append({
-                        "source_type": src_type,
-                        "title": title,
-                        "publisher": publisher,
-                        "coverage_period": coverage,
-                        "access_type": access,
-                        "url": link,
-                        "relevance_note": relevance_note
-                    })
-                st.session_state['short_df'] = pd.DataFrame(rows)
+                st.session_state['short_df'] = classify_items(items)
 
     if st.session_state['short_df'] is not None:
         short_df = st.session_state['short_df']
         st.subheader("3. Auto-Discovered Source Shortlist")
         st.dataframe(short_df.reset_index(drop=True), use_container_width=True)
 
-        approved = []
         st.markdown("---")
         st.subheader("4. Select Sources for Final Approval")
 
-        col1, col2 = st.columns([0.05, 0.95])
-        for i, r in short_df.iterrows():
-            key = f"sel_{i}"
-            with col1:
-                checked = st.checkbox("", key=key)
-            with col2:
-                st.write(f"**[{r['source_type']}]** {r['title']} *— {r['publisher']}*")
-            if checked:
-                approved.append(r)
+        # one editable table instead of a checkbox widget per row
+        edited = st.data_editor(short_df.assign(Approve=False)[["Approve", *short_df.columns]],
+                                column_config={"Approve": st.column_config.CheckboxColumn()},
+                                disabled=list(short_df.columns), hide_index=True, use_container_width=True)
+        approved = edited[edited["Approve"]].drop(columns=["Approve"])
 
         st.markdown("---")
         if st.button("5. Finalize Shortlist and Generate Category Data", type="secondary", use_container_width=True):
-            if not approved:
+            if approved.empty:
                 st.warning("Select at least one item before finalizing.")
             else:
-                final_df = pd.DataFrame(approved)
-                candidate_phrases = []
-                for txt in (final_df['title'].astype(str) + " " + final_df['relevance_note'].astype(str)):
-                    tokens = re.findall(r"\b[A-Za-z]{4,}\b", txt)
-                    candidate_phrases.extend([t.lower() for t in tokens])
-                freq = pd.Series(candidate_phrases).value_counts()
-                suggestions = list(freq.head(8).index) if not freq.empty else []
-                suggested_normalized = f"{suggestions[0].title()}" if suggestions else cat.strip().title()
-                if len(suggestions) > 1:
-                    suggested_normalized += f" > {suggestions[1].title()}"
+                final_df = approved
+                suggested_normalized = suggest_normalized(
+                    tuple(final_df['title'].astype(str)), tuple(final_df['relevance_note'].astype(str)), cat)
 
                 st.success("Shortlist finalized.")
                 st.subheader("Final Approved Shortlist")
@@ -183,10 +343,10 @@ if page == "Source Discovery":
                 st.code(suggested_normalized)
 
                 col_dl1, col_dl2 = st.columns(2)
-                col_dl1.download_button("Download Shortlist CSV", final_df.to_csv(index=False).encode('utf-8'),
+                col_dl1.download_button("Download Shortlist CSV", _df_to_csv_bytes(final_df),
                                         file_name="compeers_shortlist.csv", use_container_width=True)
                 mapping_df = pd.DataFrame([{"original_query": cat.strip(), "suggested_normalized": suggested_normalized}])
-                col_dl2.download_button("Download Mapping CSV", mapping_df.to_csv(index=False).encode('utf-8'),
+                col_dl2.download_button("Download Mapping CSV", _df_to_csv_bytes(mapping_df),
                                         file_name="compeers_suggested_mapping.csv", use_container_width=True)
 
 # =========================================================
@@ -207,16 +367,18 @@ elif page == "Market Metrics":
                 tmpdir = Path(tempfile.mkdtemp())
                 for uf in uploaded_files:
                     path = tmpdir / uf.name
+                    uf.seek(0)
                     with open(path, "wb") as f:
-                        f.write(uf.getbuffer())
+                        # 1 MiB chunks instead of materializing the whole upload
+                        shutil.copyfileobj(uf, f, length=1 << 20)
                 dfm, dfc = run_harvest(upload_dir=tmpdir, company=company, outdir=tmpdir/"outputs")
             st.success("✅ Harvest completed!")
             st.subheader("📈 Market Metrics")
             st.dataframe(dfm, use_container_width=True)
             st.subheader("🔗 Citations")
             st.dataframe(dfc, use_container_width=True)
-            st.download_button("⬇️ Download Market Metrics CSV", dfm.to_csv(index=False).encode("utf-8"), file_name="market_metrics.csv")
-            st.download_button("⬇️ Download Citations CSV", dfc.to_csv(index=False).encode("utf-8"), file_name="citations.csv")
+            st.download_button("⬇️ Download Market Metrics CSV", _df_to_csv_bytes(dfm), file_name="market_metrics.csv")
+            st.download_button("⬇️ Download Citations CSV", _df_to_csv_bytes(dfc), file_name="citations.csv")
 
 # =========================================================
 #  PAGE 3: SEARCH INTEREST
@@ -233,14 +395,15 @@ elif page == "Search Interest":
         else:
             with st.spinner("Fetching data..."):
                 use_demo = False
-                if timeframe == "demo mode" or not PYTRENDS_AVAILABLE:
+                TrendReq = None if timeframe == "demo mode" else _trend_req_cls()
+                if TrendReq is None:
                     use_demo = True
                 if not use_demo:
                     try:
-                        pytrends = TrendReq(hl='en-US', tz=330)
                         tf = "today 12-m" if timeframe == "today 12-m" else ("today 5-y" if timeframe == "today 5-y" else "all")
-                        pytrends.build_payload([topic], timeframe=tf, geo=geo)
-                        df_trends = pytrends.interest_over_time()
+                        # bypass per call rather than clearing the cache shared by all sessions
+                        fetch_trends = _fetch_interest_over_time if bypass_cache else _interest_over_time
+                        df_trends = fetch_trends(topic, geo, tf)
                         if df_trends is None or df_trends.empty:
                             use_demo = True
                     except Exception as e:
@@ -248,18 +411,14 @@ elif page == "Search Interest":
                         use_demo = True
                 if use_demo:
                     months = 60 if timeframe == "today 5-y" else 12
-                    end = datetime.date.today()
-                    dates = pd.date_range(end=end, periods=months, freq="M")
-                    values = np.clip(np.round(np.random.normal(loc=55, scale=18, size=len(dates))).astype(int), 1, 100)
-                    df_trends = pd.DataFrame({topic: values}, index=dates)
-                    df_trends.index.name = "date"
+                    df_trends = _demo_trends(topic, months, datetime.date.today())
                 st.subheader("📈 Interest Over Time")
                 st.line_chart(df_trends[topic] if topic in df_trends.columns else df_trends)
-                st.download_button("⬇️ Download Trends CSV", df_trends.reset_index().to_csv(index=False).encode("utf-8"), file_name=f"{topic}_trends.csv")
+                st.download_button("⬇️ Download Trends CSV", _df_to_csv_bytes(df_trends.reset_index()), file_name=f"{topic}_trends.csv")
                 df_related_demo = pd.DataFrame({"query": [f"{topic} benefits", f"{topic} price", f"best {topic} 2025"], "value": [95, 80, 65]})
                 st.subheader("🔎 Related Queries (Demo)")
                 st.dataframe(df_related_demo, use_container_width=True)
-                st.download_button("⬇️ Download Related Queries CSV", df_related_demo.to_csv(index=False).encode("utf-8"), file_name=f"{topic}_related_queries.csv")
+                st.download_button("⬇️ Download Related Queries CSV", _df_to_csv_bytes(df_related_demo), file_name=f"{topic}_related_queries.csv")
 
 # =========================================================
 #  PAGE 4: COMPETITOR LANDSCAPE
@@ -276,10 +435,7 @@ elif page == "Competitor Landscape":
     if st.button("Run Competitor Analysis", use_container_width=True):
         if uploaded_file:
             try:
-                if uploaded_file.name.lower().endswith(".csv"):
-                    df_comp = pd.read_csv(uploaded_file)
-                else:
-                    df_comp = pd.read_excel(uploaded_file)
+                df_comp = _read_table(uploaded_file)
             except Exception as e:
                 st.error(f"Failed to read uploaded file: {e}")
                 df_comp = pd.DataFrame()
@@ -299,23 +455,15 @@ elif page == "Competitor Landscape":
                 st.dataframe(df_comp, use_container_width=True)
             else:
                 if rubric == "MOVI (Market/Offering/Value/Innovation)":
-                    demo_values = {
-                        "Market Share": ["High", "Medium", "Low"],
-                        "Offering": ["Premium", "Mass", "Niche"],
-                        "Value Proposition": ["Quality", "Price", "Reach"],
-                        "Innovation": ["Strong", "Moderate", "Weak"]
-                    }
+                    demo_values = MOVI_DEMO_VALUES
                 elif rubric == "SWOT (Strength/Weakness/Opportunity/Threat)":
-                    demo_values = {
-                        "Strength": ["Brand", "Distribution", "R&D"],
-                        "Weakness": ["Price", "Portfolio gap", "Quality perception"],
-                        "Opportunity": ["Channel expansion", "New segment", "Premiumization"],
-                        "Threat": ["Regulation", "New entrants", "Raw material cost"]
-                    }
+                    demo_values = SWOT_DEMO_VALUES
                 else:
-                    demo_values = {c: [f"{c} A", f"{c} B", f"{c} C"] for c in custom_cols}
+                    demo_values = {c: np.array([f"{c} A", f"{c} B", f"{c} C"], dtype=object) for c in custom_cols}
+                # int8 codes cycling over three labels instead of one object string per cell
+                codes = (np.arange(len(df_comp)) % 3).astype(np.int8)
                 for col, values in demo_values.items():
-                    df_comp[col] = list(itertools.islice(itertools.cycle(values), len(df_comp)))
+                    df_comp[col] = pd.Categorical.from_codes(codes, categories=values)
                 st.subheader(f"📊 Competitor Table — {rubric.split()[0]}")
                 st.dataframe(df_comp, use_container_width=True)
-            st.download_button("⬇️ Download Competitor CSV", df_comp.to_csv(index=False).encode("utf-8"), file_name="competitor_analysis.csv")
+            st.download_button("⬇️ Download Competitor CSV", _df_to_csv_bytes(df_comp), file_name="competitor_analysis.csv")
@@ -1,33 +1,105 @@
+import logging
+import threading
+import time
 import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import xml.etree.ElementTree as ET
 from datetime import datetime
-from .parsers import find_market_numbers
+from .parsers import find_market_numbers_stream
 from .models import MarketMetrics, Citation
 
+logger = logging.getLogger(__name__)
+
 USER_AGENT = "CompeersAI Bot"
+_ATOM = "{http://www.w3.org/2005/Atom}"
+TIMEOUT = 30
+MAX_WORKERS = 8
+# SEC's fair-access policy allows at most 10 requests/second; MAX_WORKERS only bounds
+# concurrency, so every request also waits for its slot in _throttle
+MAX_REQUESTS_PER_SECOND = 10
+CHUNK_SIZE = 256 * 1024
+EXCERPT_LEN = 800
+
+# one pooled keep-alive session, so successive filings reuse the TLS connection to sec.gov
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": USER_AGENT})
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20,
+                                       max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                                                         raise_on_status=False)))
+
+_RATE_LOCK = threading.Lock()
+_next_request_at = 0.0
+
+def _throttle():
+    # hand out request start times at least 1/MAX_REQUESTS_PER_SECOND apart across threads
+    global _next_request_at
+    with _RATE_LOCK:
+        now = time.monotonic()
+        start = max(now, _next_request_at)
+        _next_request_at = start + 1.0 / MAX_REQUESTS_PER_SECOND
+    if start > now:
+        time.sleep(start - now)
+
+def _get(url):
+    _throttle()
+    return _SESSION.get(url, timeout=TIMEOUT, stream=True)
 
 def edgar_search(company: str, count=20):
     url = f"https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&company={company}&type=10-K&count={count}&output=atom"
-    headers = {"User-Agent": USER_AGENT}
-    r = requests.get(url, headers=headers)
-    soup = BeautifulSoup(r.text, "xml")
     entries = []
-    for e in soup.find_all("entry"):
-        entries.append({
-            "title": e.title.text,
-            "link": e.link["href"],
-            "updated": e.updated.text
-        })
+    try:
+        with _get(url) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True
+            # stream the atom feed; each entry is dropped once its fields are read
+            for _, el in ET.iterparse(r.raw, events=("end",)):
+                if el.tag == _ATOM + "entry":
+                    link = el.find(_ATOM + "link")
+                    entries.append({
+                        "title": el.findtext(_ATOM + "title", ""),
+                        "link": link.get("href") if link is not None else "",
+                        "updated": el.findtext(_ATOM + "updated", "")
+                    })
+                    el.clear()
+    except (requests.RequestException, ET.ParseError) as e:
+        # e.g. SEC's HTML "Undeclared Automated Tool" page; keep whatever parsed so far
+        logger.warning("EDGAR search for %s failed: %s", company, e)
     return entries
 
+def _scan_filing(filing):
+    # stream the 10-K through the scanner instead of holding the whole body as one str
+    excerpt = ""
+    try:
+        with _get(filing["link"]) as r:
+            r.raise_for_status()
+            r.encoding = r.encoding or "utf-8"
+
+            def chunks():
+                nonlocal excerpt
+                for chunk in r.iter_content(chunk_size=CHUNK_SIZE, decode_unicode=True):
+                    if len(excerpt) < EXCERPT_LEN:
+                        excerpt += chunk[:EXCERPT_LEN - len(excerpt)]
+                    yield chunk
+
+            return find_market_numbers_stream(chunks()), excerpt
+    except requests.RequestException as e:
+        # one unreachable filing should not abort the rest of the harvest
+        logger.warning("Skipping EDGAR filing %s: %s", filing["link"], e)
+        return None
+
 def harvest_edgar(company: str):
     filings = edgar_search(company)
     metrics, citations = [], []
-    for f in filings:
-        txt = requests.get(f["link"], headers={"User-Agent": USER_AGENT}).text
-        history, total, cur, cagr = find_market_numbers(txt)
-        if total or history:
-            m = MarketMetrics(source_id=f["title"], total_market_size=total, currency=cur, history=history, cagr=cagr)
-            c = Citation(source_id=f["title"], source_type="edgar", url_or_path=f["link"], excerpt=txt[:800], access_date=datetime.utcnow().isoformat())
-            metrics.append(m); citations.append(c)
+    # downloads overlap each other and the parsing of filings that already arrived
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        for f, scanned in zip(filings, ex.map(_scan_filing, filings)):
+            if scanned is None:
+                continue
+            (history, total, cur, cagr), excerpt = scanned
+            if total or history:
+                m = MarketMetrics(source_id=f["title"], total_market_size=total, currency=cur, history=history, cagr=cagr)
+                c = Citation(source_id=f["title"], source_type="edgar", url_or_path=f["link"], excerpt=excerpt, access_date=datetime.utcnow().isoformat())
+                metrics.append(m); citations.append(c)
     return metrics, citations
@@ -1,16 +1,29 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import pandas as pd
-import json
 from .parsers import parse_provider_file
 from .edgar import harvest_edgar
+from .utils import dumps_json, PROCESS_POOL_CONTEXT
+
+# only large PDF/Excel files are worth a worker process; the rest parse faster in-process
+POOL_SUFFIXES = {".pdf", ".xls", ".xlsx"}
+POOL_MIN_BYTES = 1 << 20
 
 def harvest_from_uploads(upload_dir: Path):
     metrics, citations = [], []
-    for f in Path(upload_dir).iterdir():
-        if f.is_file():
-            m, c = parse_provider_file(f)
-            if m:
-                metrics.append(m); citations.extend(c)
+    files = [f for f in Path(upload_dir).iterdir() if f.is_file()]
+    heavy = [f for f in files if f.suffix.lower() in POOL_SUFFIXES and f.stat().st_size >= POOL_MIN_BYTES]
+    parsed = {}
+    if len(heavy) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(heavy), os.cpu_count() or 1),
+                                 mp_context=PROCESS_POOL_CONTEXT) as ex:
+            parsed = dict(zip(heavy, ex.map(parse_provider_file, heavy)))
+    # directory order, whether a file went through the pool or not
+    for f in files:
+        m, c = parsed[f] if f in parsed else parse_provider_file(f)
+        if m:
+            metrics.append(m); citations.extend(c)
     return metrics, citations
 
 def run_harvest(upload_dir="uploads", company=None, outdir="outputs"):
@@ -20,10 +33,13 @@ def run_harvest(upload_dir="uploads", company=None, outdir="outputs"):
         m2, c2 = harvest_edgar(company)
         metrics.extend(m2); citations.extend(c2)
     # save csv/json
-    dfm = pd.DataFrame([m.to_dict() for m in metrics])
-    dfc = pd.DataFrame([c.to_dict() for c in citations])
+    records_m = [m.to_dict() for m in metrics]
+    records_c = [c.to_dict() for c in citations]
+    dfm = pd.DataFrame(records_m)
+    dfc = pd.DataFrame(records_c)
     dfm.to_csv(Path(outdir)/"market_metrics.csv", index=False)
     dfc.to_csv(Path(outdir)/"citations.csv", index=False)
-    dfm.to_json(Path(outdir)/"market_metrics.json", orient="records", indent=2)
-    dfc.to_json(Path(outdir)/"citations.json", orient="records", indent=2)
+    # JSON straight from the records rather than round-tripping through the DataFrames
+    (Path(outdir)/"market_metrics.json").write_bytes(dumps_json(records_m, indent=True))
+    (Path(outdir)/"citations.json").write_bytes(dumps_json(records_c, indent=True))
     return dfm, dfc
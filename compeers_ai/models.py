@@ -1,7 +1,10 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import Dict, Optional
+from .utils import dumps_json
 
-@dataclass
+# slots: no per-instance __dict__; eq=False: records are only ever compared by identity
+# to_dict builds the dict directly instead of asdict's deep copy
+@dataclass(slots=True, eq=False)
 class Citation:
     source_id: str
     source_type: str
@@ -11,9 +14,19 @@ class Citation:
     confidence: float = 0.7
 
     def to_dict(self):
-        return asdict(self)
+        return {
+            "source_id": self.source_id,
+            "source_type": self.source_type,
+            "url_or_path": self.url_or_path,
+            "excerpt": self.excerpt,
+            "access_date": self.access_date,
+            "confidence": self.confidence,
+        }
 
-@dataclass
+    def to_json_bytes(self) -> bytes:
+        return dumps_json(self.to_dict())
+
+@dataclass(slots=True, eq=False)
 class MarketMetrics:
     source_id: str
     total_market_size: Optional[float] = None
@@ -27,7 +40,25 @@ class MarketMetrics:
     notes: Optional[str] = None
 
     def to_dict(self):
-        d = asdict(self)
-        if isinstance(self.history, dict):
-            d['history'] = {str(k): v for k, v in self.history.items()}
-        return d
+        history = self.history
+        if isinstance(history, dict):
+            history = {str(k): v for k, v in history.items()}
+        return self._as_dict(history)
+
+    def to_json_bytes(self) -> bytes:
+        # the serializer writes the int year keys as strings, so history is not rebuilt
+        return dumps_json(self._as_dict(self.history), non_str_keys=True)
+
+    def _as_dict(self, history):
+        return {
+            "source_id": self.source_id,
+            "total_market_size": self.total_market_size,
+            "currency": self.currency,
+            "period_start": self.period_start,
+            "period_end": self.period_end,
+            "history": history,
+            "cagr": self.cagr,
+            "subcategory_splits": self.subcategory_splits,
+            "channel_splits": self.channel_splits,
+            "notes": self.notes,
+        }
@@ -1,50 +1,192 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import pandas as pd
 import pdfplumber
+import openpyxl
+import csv
+from itertools import islice
 import re
 from datetime import datetime
-from .utils import safe_parse_float, detect_currency, compute_cagr
+from .utils import safe_parse_float, detect_currency, compute_cagr, CURRENCY_PRIORITY, PROCESS_POOL_CONTEXT
 from .models import MarketMetrics, Citation
 
-def extract_text_from_pdf(path: Path) -> str:
-    text = []
+logger = logging.getLogger(__name__)
+
+# pypdfium2 optional import; pdfplumber is the fallback
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+_PDFIUM_LOCK = threading.Lock()
+
+# year/value pairs and the market size in one pass; the size branch is a zero-width
+# lookahead so it never consumes text a year/value pair would start in
+_MARKET_RE = re.compile(
+    r"(?P<year>20\d{2})[^0-9]{0,5}(?P<value>[\d,\.]+)"
+    r"|(?=market size[^\d]{0,80}(?P<size>[\d,\.]+))", re.I)
+_MARKET_SIZE_RE = re.compile(r"market size[^\d]{0,80}([\d,\.]+)", re.I)
+# tail kept between chunks; matches are assumed to be shorter than this
+_OVERLAP = 4096
+
+PREVIEW_ROWS = 50
+EXCERPT_LEN = 500
+
+# below this many pages the pool start-up costs more than it saves
+PARALLEL_MIN_PAGES = 16
+
+def _extract_page_range(args):
+    path, start, stop = args
+    # one open per batch of pages, not per page
+    with pdfplumber.open(path) as pdf:
+        return [t for t in (pdf.pages[i].extract_text() for i in range(start, stop)) if t]
+
+def _iter_pdf_pages(path: Path):
+    """Yield the non-empty text of each page, in order, one page at a time."""
+    if pdfium is not None:
+        # PDFium isn't thread-safe even across documents, and Streamlit sessions share the
+        # process; the lock covers open, every page read and close
+        with _PDFIUM_LOCK:
+            try:
+                pdf = pdfium.PdfDocument(str(path))
+            except pdfium.PdfiumError:
+                pdf = None
+            if pdf is not None:
+                try:
+                    for page in pdf:
+                        t = page.get_textpage().get_text_range()
+                        if t:
+                            yield t.replace("\r\n", "\n")
+                finally:
+                    pdf.close()
+                return
     with pdfplumber.open(str(path)) as pdf:
-        for page in pdf.pages:
-            t = page.extract_text()
-            if t:
-                text.append(t)
-    return "\n".join(text)
+        n = len(pdf.pages)
+        # stay serial inside harvest_from_uploads' workers rather than nesting pools
+        if n < PARALLEL_MIN_PAGES or multiprocessing.parent_process() is not None:
+            for page in pdf.pages:
+                t = page.extract_text()
+                if t:
+                    yield t
+            return
+    workers = min(os.cpu_count() or 1, n)
+    step = -(-n // (4 * workers))
+    batches = [(str(path), i, min(i + step, n)) for i in range(0, n, step)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=PROCESS_POOL_CONTEXT) as ex:
+        for part in ex.map(_extract_page_range, batches):
+            yield from part
+
+def extract_text_from_pdf(path: Path) -> str:
+    return "\n".join(_iter_pdf_pages(path))
+
+def _scan_pdf(path: Path):
+    # pages go through the streaming scanner one at a time; only the excerpt is kept
+    head = []
+
+    def chunks():
+        size = 0
+        for i, t in enumerate(_iter_pdf_pages(path)):
+            if i:
+                t = "\n" + t
+            if size < EXCERPT_LEN:
+                head.append(t[:EXCERPT_LEN - size])
+                size += len(head[-1])
+            yield t
+
+    found = find_market_numbers_stream(chunks())
+    return found, "".join(head)
 
 def find_market_numbers(text: str):
     history = {}
-    pairs = re.findall(r"(20\d{2})[^0-9]{0,5}([\d,\.]+)", text)
-    for year, val in pairs:
-        try:
-            history[int(year)] = safe_parse_float(val)
-        except:
-            continue
     total = None
-    m = re.search(r"market size.*?([\d,\.]+)", text, flags=re.I)
-    if m:
-        total = safe_parse_float(m.group(1))
+    if "20" in text:
+        for m in _MARKET_RE.finditer(text):
+            year, val, size = m.group("year", "value", "size")
+            if year:
+                v = safe_parse_float(val)
+                if v is not None:
+                    history[int(year)] = v
+            elif total is None:
+                total = safe_parse_float(size)
+    else:
+        # no year can match, so stop at the first market size instead of scanning on
+        m = _MARKET_SIZE_RE.search(text)
+        if m:
+            total = safe_parse_float(m.group(1))
     cur = detect_currency(text)
     cagr = compute_cagr(history) if history else None
     return history, total, cur, cagr
 
+def find_market_numbers_stream(chunks):
+    """Same result as find_market_numbers("".join(chunks)) without holding the whole text."""
+    history, total, cur = {}, None, None
+    buf = ""
+    chunks = iter(chunks)
+    chunk = next(chunks, None)
+    while chunk is not None:
+        buf += chunk
+        chunk = next(chunks, None)
+        # matches starting past the cut are left for the next window, which rescans the tail
+        cut = len(buf) if chunk is None else max(len(buf) - _OVERLAP, 0)
+        end = 0
+        for m in _MARKET_RE.finditer(buf):
+            if m.start() >= cut:
+                break
+            year, val, size = m.group("year", "value", "size")
+            if year:
+                v = safe_parse_float(val)
+                if v is not None:
+                    history[int(year)] = v
+                end = m.end()
+            elif total is None:
+                total = safe_parse_float(size)
+        if cur != CURRENCY_PRIORITY[0]:
+            c = detect_currency(buf)
+            if c and (cur is None or CURRENCY_PRIORITY.index(c) < CURRENCY_PRIORITY.index(cur)):
+                cur = c
+        buf = buf[max(cut, end):]
+    cagr = compute_cagr(history) if history else None
+    return history, total, cur, cagr
+
+def _preview_rows(path: Path):
+    # header + first PREVIEW_ROWS rows only, without parsing the rest of the file
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return list(islice(csv.reader(f), PREVIEW_ROWS + 1))
+    if suffix == ".xlsx":
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            # sheet 0 like pd.read_excel, not whichever sheet was active on save
+            rows = islice(wb.worksheets[0].iter_rows(values_only=True), PREVIEW_ROWS + 1)
+            return [["" if v is None else str(v) for v in row] for row in rows]
+        finally:
+            wb.close()
+    # legacy .xls has no streaming reader
+    df = pd.read_excel(path, nrows=PREVIEW_ROWS)
+    return [[str(c) for c in df.columns]] + df.astype(str).values.tolist()
+
 def parse_provider_file(path: Path):
-    text = ""
+    found, excerpt = None, ""
     if path.suffix.lower() in [".csv", ".xls", ".xlsx"]:
+        text = ""
         try:
-            df = pd.read_csv(path) if path.suffix.lower()==".csv" else pd.read_excel(path)
-            text = " ".join(df.astype(str).fillna("").head(50).to_string().split())
-        except:
-            pass
+            text = " ".join(" ".join(v for row in _preview_rows(path) for v in row).split())
+        except Exception:
+            # csv, openpyxl, xlrd and pandas each raise their own errors on a bad upload;
+            # skip the file rather than abort the rest of the harvest
+            logger.warning("Could not read %s, skipping it", path.name, exc_info=True)
+        if text:
+            found, excerpt = find_market_numbers(text), text[:EXCERPT_LEN]
     elif path.suffix.lower() == ".pdf":
-        text = extract_text_from_pdf(path)
+        found, excerpt = _scan_pdf(path)
 
-    if text:
-        history, total, cur, cagr = find_market_numbers(text)
+    if excerpt:
+        history, total, cur, cagr = found
         metrics = MarketMetrics(source_id=path.name, total_market_size=total, currency=cur, history=history, cagr=cagr)
-        citation = Citation(source_id=path.name, source_type="upload", url_or_path=str(path), excerpt=text[:500], access_date=datetime.utcnow().isoformat())
+        citation = Citation(source_id=path.name, source_type="upload", url_or_path=str(path), excerpt=excerpt, access_date=datetime.utcnow().isoformat())
         return metrics, [citation]
     return None, []
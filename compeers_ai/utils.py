@@ -1,5 +1,26 @@
 import re
-from typing import Optional, Dict
+import json
+import multiprocessing
+from functools import lru_cache
+from math import expm1, log
+import numpy as np
+from typing import Any, Optional, Dict
+
+# orjson optional import
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# spawn, not fork: forking Streamlit's multithreaded server can deadlock a child on a lock
+# another thread held at fork time
+PROCESS_POOL_CONTEXT = multiprocessing.get_context("spawn")
+
+_CURRENCY_SYMBOLS = "$€£₹"
+_TRAILING_UNITS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ "
+_FLOAT_SIGNED_RE = re.compile(r"[-+]?\d*\.?\d+")
+_UNIT_RE = re.compile(r"\d\s*(bn|b|billion|mn|m|million)\b", re.I)
+_UNIT_MULTIPLIERS = {"b": 1e9, "bn": 1e9, "billion": 1e9, "m": 1e6, "mn": 1e6, "million": 1e6}
 
 def safe_parse_float(s: Optional[str]) -> Optional[float]:
     """Convert string with $, commas, million/billion notation into float."""
@@ -8,42 +29,72 @@ def safe_parse_float(s: Optional[str]) -> Optional[float]:
     if isinstance(s, (int, float)):
         return float(s)
 
-    s2 = str(s).lower().replace(",", "").strip()
+    s2 = str(s).replace(",", "").strip().lstrip(_CURRENCY_SYMBOLS).lstrip()
+    if s2.isdecimal():
+        return float(s2)
+    # only a unit token right after the number scales it, so "program" or "10 lb" don't;
+    # only that token is lowercased, not the whole cell
+    unit = _UNIT_RE.search(s2)
+    mult = _UNIT_MULTIPLIERS[unit.group(1).lower()] if unit else 1.0
     try:
-        if "billion" in s2 or "bn" in s2:
-            return float(re.findall(r"[\d\.]+", s2)[0]) * 1e9
-        elif "million" in s2 or "m" in s2:
-            return float(re.findall(r"[\d\.]+", s2)[0]) * 1e6
-        else:
-            return float(re.findall(r"[-+]?\d*\.?\d+", s2)[0])
-    except Exception:
-        return None
+        return float(s2.rstrip(_TRAILING_UNITS)) * mult
+    except ValueError:
+        m = _FLOAT_SIGNED_RE.search(s2)
+        return float(m.group()) * mult if m else None
+
+# detect_currency's order: the first currency found in this list wins
+CURRENCY_PRIORITY = ("USD", "EUR", "GBP", "INR")
+_CURRENCY_RANK = {c: i for i, c in enumerate(CURRENCY_PRIORITY)}
+_CURRENCY_SYMBOL_CODES = {"$": "USD", "€": "EUR", "£": "GBP", "₹": "INR"}
+_CURRENCY_RE = re.compile(r"[$€£₹]|usd|eur|gbp|inr", re.I)
 
 def detect_currency(text: str) -> Optional[str]:
     """Detect common currency from text string."""
     if not text:
         return None
-    if "$" in text or "usd" in text.lower():
-        return "USD"
-    if "€" in text or "eur" in text.lower():
-        return "EUR"
-    if "£" in text or "gbp" in text.lower():
-        return "GBP"
-    if "₹" in text or "inr" in text.lower():
-        return "INR"
-    return None
+    # one case-insensitive pass instead of lowercasing and searching four times
+    best = None
+    for m in _CURRENCY_RE.finditer(text):
+        tok = m.group()
+        cur = _CURRENCY_SYMBOL_CODES.get(tok) or tok.upper()
+        if cur == CURRENCY_PRIORITY[0]:
+            return cur
+        if best is None or _CURRENCY_RANK[cur] < _CURRENCY_RANK[best]:
+            best = cur
+    return best
 
 def compute_cagr(history: Dict[int, float]) -> Optional[float]:
     """Compute CAGR from history dictionary {year: value}."""
     if not history or len(history) < 2:
         return None
-    years = sorted(history.keys())
-    start, end = years[0], years[-1]
-    vs, ve = history[start], history[end]
+    # only the first and last year matter: min/max instead of sorting every entry
+    start, end = min(history), max(history)
+    return _compute_cagr_endpoints(start, history[start], end, history[end])
+
+@lru_cache(maxsize=4096)
+def _compute_cagr_endpoints(start: int, vs: Optional[float], end: int, ve: Optional[float]) -> Optional[float]:
     if not vs or vs <= 0:
         return None
-    n = end - start
-    try:
-        return (ve / vs) ** (1.0 / n) - 1.0
-    except Exception:
+    if ve is None or ve < 0:
         return None
+    if ve == 0:
+        return -1.0
+    # expm1/log instead of a fractional pow; also accurate for near-zero growth
+    return expm1(log(ve / vs) / (end - start))
+
+def compute_cagr_batch(starts: np.ndarray, ends: np.ndarray, ns: np.ndarray) -> np.ndarray:
+    """Vectorized CAGR over parallel arrays; NaN where compute_cagr returns None."""
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+    ns = np.asarray(ns, dtype=np.float64)
+    valid = (starts > 0) & (ends >= 0) & (ns > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(valid, np.expm1(np.log(ends / starts) / ns), np.nan)
+
+def dumps_json(obj: Any, indent: bool = False, non_str_keys: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_NON_STR_KEYS if non_str_keys else 0)
+        return orjson.dumps(obj, option=option)
+    # json.dumps already writes int keys as strings
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
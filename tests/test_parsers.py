@@ -0,0 +1,89 @@
+import io
+import zipfile
+
+import openpyxl
+import pytest
+
+from compeers_ai.harvester import harvest_from_uploads
+from compeers_ai.parsers import find_market_numbers, find_market_numbers_stream
+
+
+def _write_good_csv(folder):
+    (folder / "good.csv").write_text("Year,Size\n2020,$100\n2024,$200\n", encoding="utf-8")
+
+
+def _write_truncated_sheet_xlsx(path):
+    # a real workbook whose sheet XML is cut off mid-element: openpyxl raises ParseError
+    wb = openpyxl.Workbook()
+    wb.active.append(["Year", "Size"])
+    wb.active.append([2020, 100])
+    buf = io.BytesIO()
+    wb.save(buf)
+    with zipfile.ZipFile(buf) as src, zipfile.ZipFile(path, "w") as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                data = data[:len(data) // 2]
+            dst.writestr(item, data)
+
+
+def _write_no_workbook_xlsx(path):
+    # a zip with no workbook parts: openpyxl raises KeyError for [Content_Types].xml
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("readme.txt", "not a workbook")
+
+
+def _write_garbage_xls(path):
+    # OLE2 magic so pandas hands it to xlrd, which then fails on the body
+    path.write_bytes(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00\x01 not a compound document" * 40)
+
+
+@pytest.mark.parametrize("name, write_bad", [
+    ("broken.xlsx", _write_no_workbook_xlsx),
+    ("truncated.xlsx", _write_truncated_sheet_xlsx),
+    ("garbage.xls", _write_garbage_xls),
+])
+def test_malformed_upload_is_skipped(tmp_path, name, write_bad):
+    _write_good_csv(tmp_path)
+    write_bad(tmp_path / name)
+
+    metrics, citations = harvest_from_uploads(tmp_path)
+
+    assert [m.source_id for m in metrics] == ["good.csv"]
+    assert metrics[0].history == {2020: 100.0, 2024: 200.0}
+    assert [c.source_id for c in citations] == ["good.csv"]
+
+
+def _pad_to(text, length):
+    filler = "lorem ipsum dolor sit amet "
+    return text + (filler * (length // len(filler) + 1))[:length - len(text)]
+
+
+def _market_text():
+    # matches placed across the 4097-char chunk boundaries and inside the 4096-char overlap
+    text = _pad_to("revenue in € terms ", 4090)
+    text += "market size of 12.5 bn "         # lookahead straddles the first boundary
+    text = _pad_to(text, 8190)
+    text += "2019: 1,250.5 and 2020 1,400 "  # pair straddles the second boundary
+    text = _pad_to(text, 10000)
+    text += "2019 1,300 restated "            # later value for a year overrides the earlier one
+    text += "market size 99 "                 # not the first size, must not win
+    text = _pad_to(text, 12287)
+    text += "2024 - 2,000 in $ "
+    return text
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096 + 1, 100000])
+def test_stream_matches_whole_text(chunk_size):
+    text = _market_text()
+    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    expected = find_market_numbers(text)
+    assert expected[0] == {2019: 1300.0, 2020: 1400.0, 2024: 2000.0}
+    assert expected[1:3] == (12.5, "USD")
+
+    history, total, cur, cagr = find_market_numbers_stream(chunks)
+    assert history == expected[0]
+    assert total == expected[1]
+    assert cur == expected[2]
+    assert cagr == pytest.approx(expected[3])
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from compeers_ai.utils import compute_cagr, compute_cagr_batch, safe_parse_float
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("1,200", 1200.0),
+    ("$1.2bn", 1.2e9),
+    ("1.2 BN", 1.2e9),
+    ("2.5 billion usd", 2.5e9),
+    ("5 billion US dollars", 5e9),
+    ("2 Billion Dollars", 2e9),
+    ("7 million euros in annual revenue", 7e6),
+    ("3 Million", 3e6),
+    ("4m", 4e6),
+    ("1.5 mn", 1.5e6),
+    ("€ 7", 7.0),
+    ("-3", -3.0),
+    ("12.", 12.0),
+    ("1.2.3", 1.2),
+    # unit-looking words that are not a unit right after the number
+    ("20 program", 20.0),
+    ("market 5", 5.0),
+    ("10 lb", 10.0),
+    ("5 kb", 5.0),
+    ("12 months", 12.0),
+    (".", None),
+    ("", None),
+    (None, None),
+    (5, 5.0),
+])
+def test_safe_parse_float(raw, expected):
+    assert safe_parse_float(raw) == expected
+
+
+def test_compute_cagr_batch_matches_compute_cagr():
+    starts = np.array([100.0, 100.0, 100.0, 0.0, 100.0])
+    ends = np.array([121.0, 0.0, -5.0, 5.0, 100.0])
+    ns = np.array([2, 2, 2, 2, 1])
+    out = compute_cagr_batch(starts, ends, ns)
+    for vs, ve, n, got in zip(starts, ends, ns, out):
+        expected = compute_cagr({2000: vs, 2000 + int(n): ve})
+        if expected is None:
+            assert np.isnan(got)
+        else:
+            assert got == pytest.approx(expected)
+
+
+def test_compute_cagr_batch_scalars():
+    assert float(compute_cagr_batch(100, 200, 5)) == pytest.approx(2 ** 0.2 - 1)
+    assert np.isnan(compute_cagr_batch(0, 200, 5))